@@ -5,13 +5,17 @@ from __future__ import annotations
 import argparse
 import csv
 import os
+import queue
+import select
 import signal
 import sys
+import threading
 import time
+from contextlib import ExitStack
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:
     from zoneinfo import ZoneInfo
@@ -29,11 +33,27 @@ except ImportError as exc:  # pragma: no cover - dependency guard
     )
     raise
 
+try:
+    from psycopg_pool import ConnectionPool, PoolTimeout
+except ImportError:  # pragma: no cover - optional dependency
+    ConnectionPool = None
+    PoolTimeout = None
+
 
 DEFAULT_INTERVAL_SECONDS = 0.1
 DEFAULT_TABLE_NAME = "downtime_probe"
 DEFAULT_LOG_FILE = "postgres_downtime_probe.log"
+DEFAULT_ERROR_LOG_FILE = "postgres_downtime_probe.errors.log"
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+LOG_BUFFER_SIZE = 64 * 1024
+LOG_QUEUE_SIZE = 10_000
+# How long to wait for the pool's initial connections at startup, and for a
+# ready spare at checkout before connecting directly instead.
+POOL_OPEN_TIMEOUT_SECONDS = 10.0
+POOL_CHECKOUT_TIMEOUT_SECONDS = 0.001
 LOCAL_TZ = ZoneInfo("America/New_York")
+# Indexed by the attempt's success flag to avoid a conditional per logged row.
+STATUS_LABELS = ("failure", "success")
 
 
 @dataclass
@@ -41,6 +61,7 @@ class ProbeStats:
     total_attempts: int = 0
     success_count: int = 0
     failure_count: int = 0
+    dropped_log_rows: int = 0
 
 
 @dataclass
@@ -52,6 +73,10 @@ class DowntimeTracker:
         self.intervals = []
         self._current_start = None
 
+    @property
+    def in_downtime(self) -> bool:
+        return self._current_start is not None
+
     def record(self, event_time: datetime, success: bool) -> None:
         if success:
             if self._current_start is not None:
@@ -116,11 +141,64 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=DEFAULT_LOG_FILE,
         help="Path to the CSV log file for attempt results",
     )
+    parser.add_argument(
+        "--error-log-file",
+        default=DEFAULT_ERROR_LOG_FILE,
+        help=(
+            "Path to the log receiving the full error detail of the first failure "
+            "in each downtime interval; the CSV only records the exception type"
+        ),
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=DEFAULT_FLUSH_INTERVAL_SECONDS,
+        help=(
+            "Seconds between flushes of the CSV log (default: 1.0). The log is "
+            "also flushed whenever the database recovers from downtime."
+        ),
+    )
+    parser.add_argument(
+        "--use-csv-writer",
+        action="store_true",
+        help="Write log rows through csv.writer instead of the pre-formatted fast path",
+    )
     parser.add_argument(
         "--max-attempts",
         type=int,
         help="Optional cap on the number of attempts before exiting",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help=(
+            "Number of attempts buffered before they are inserted in one "
+            "pipelined round-trip (default: 1, insert every attempt immediately)"
+        ),
+    )
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=1,
+        help=(
+            "Number of inserts kept in flight in pipeline mode before waiting for "
+            "their results (default: 1, confirm every flush immediately). Deeper "
+            "pipelines share one round-trip between several attempts but confirm "
+            "them later, so downtime is detected up to that many attempts late; "
+            "a failure marks every unconfirmed attempt as failed."
+        ),
+    )
+    parser.add_argument(
+        "--use-pool",
+        action="store_true",
+        help=(
+            "Keep a warm spare connection in a psycopg_pool.ConnectionPool so "
+            "reconnects after a failure are immediate when a spare is ready; "
+            "otherwise the probe connects directly, so the pool's reconnect "
+            "backoff never delays detecting recovery (requires psycopg_pool)"
+        ),
+    )
     parser.add_argument(
         "--create-table-only",
         action="store_true",
@@ -131,6 +209,14 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
 
     if args.interval <= 0:
         parser.error("--interval must be greater than zero")
+    if args.flush_interval < 0:
+        parser.error("--flush-interval must not be negative")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.pipeline_depth < 1:
+        parser.error("--pipeline-depth must be at least 1")
+    if args.use_pool and ConnectionPool is None:
+        parser.error("--use-pool requires psycopg_pool. Install with: pip install psycopg_pool")
 
     return args
 
@@ -151,9 +237,9 @@ def resolve_password(var_name: str) -> Optional[str]:
     return None
 
 
-def open_connection(args: argparse.Namespace) -> psycopg.Connection:
+def connection_params(args: argparse.Namespace) -> Tuple[str, Dict[str, object]]:
     if args.dsn:
-        return psycopg.connect(args.dsn, autocommit=True)
+        return args.dsn, {"autocommit": True}
 
     password = resolve_password(args.password_env)
     conn_args = {
@@ -166,10 +252,57 @@ def open_connection(args: argparse.Namespace) -> psycopg.Connection:
     if password is not None:
         conn_args["password"] = password
 
-    return psycopg.connect(**conn_args)
+    return "", conn_args
+
+
+def open_connection(args: argparse.Namespace) -> psycopg.Connection:
+    conninfo, conn_args = connection_params(args)
+    return psycopg.connect(conninfo, **conn_args)
+
+
+def open_pool(args: argparse.Namespace) -> "ConnectionPool":
+    # Two connections: the probe uses one while the other stays warm, so a
+    # failed connection is replaced without paying for a full reconnect.
+    # Connections are checked on checkout so a spare that died with the server
+    # is discarded instead of handed out.
+    conninfo, conn_args = connection_params(args)
+    pool = ConnectionPool(
+        conninfo,
+        kwargs=conn_args,
+        min_size=2,
+        max_size=2,
+        open=True,
+        check=ConnectionPool.check_connection,
+    )
+    # Let the first connections finish before probing; if they don't,
+    # checkout() connects directly until they do.
+    try:
+        pool.wait(timeout=POOL_OPEN_TIMEOUT_SECONDS)
+    except PoolTimeout:
+        pass
+    return pool
+
+
+def checkout(
+    args: argparse.Namespace, pool: Optional["ConnectionPool"], session: ExitStack
+) -> psycopg.Connection:
+    """Return a ready pooled connection, or a direct one if none is ready.
+
+    After an outage the pool refills on its own exponential backoff; falling
+    back to a direct connect means recovery is seen on the next attempt.
+    """
+    if pool is not None:
+        try:
+            conn = pool.getconn(timeout=POOL_CHECKOUT_TIMEOUT_SECONDS)
+        except PoolTimeout:
+            pass
+        else:
+            session.callback(pool.putconn, conn)
+            return conn
+    return session.enter_context(open_connection(args))
 
 
-def ensure_table(conn: psycopg.Connection, identifier: Tuple[str, ...]) -> None:
+def ensure_table(conn: psycopg.Connection, table: sql.Identifier) -> None:
     column_definitions = sql.SQL(
         """
         CREATE TABLE IF NOT EXISTS {table} (
@@ -181,35 +314,53 @@ def ensure_table(conn: psycopg.Connection, identifier: Tuple[str, ...]) -> None:
         """
     )
     with conn.cursor() as cur:
-        cur.execute(column_definitions.format(table=sql.Identifier(*identifier)))
+        cur.execute(column_definitions.format(table=table))
 
 
-def truncate_table(conn: psycopg.Connection, identifier: Tuple[str, ...]) -> None:
+def truncate_table(conn: psycopg.Connection, table: sql.Identifier) -> None:
     with conn.cursor() as cur:
-        cur.execute(sql.SQL("TRUNCATE TABLE {table}").format(table=sql.Identifier(*identifier)))
+        cur.execute(sql.SQL("TRUNCATE TABLE {table}").format(table=table))
 
 
-def build_insert(identifier: Tuple[str, ...]) -> sql.Composed:
+def build_insert(conn: psycopg.Connection, table: sql.Identifier) -> str:
+    # Render to plain text so the server-side prepared statement is keyed on a
+    # stable query string; this runs once per connection, not per attempt.
     return sql.SQL(
         """
         INSERT INTO {table} (observed_at, probe_label, note)
         VALUES (%s, %s, %s)
         """
-    ).format(table=sql.Identifier(*identifier))
+    ).format(table=table).as_string(conn)
 
 
-def setup_signal_handler(stop_flag: dict) -> None:
+def setup_signal_handler(stop_flag: List[bool]) -> Tuple[int, int]:
     def handler(signum: int, _frame) -> None:  # pragma: no cover - signal handling
-        stop_flag["stop"] = True
+        stop_flag[0] = True
+
+    # Signals also write a byte to this pipe, letting the probe loop sleep in
+    # select() and wake up as soon as a shutdown is requested.
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
 
     signal.signal(signal.SIGINT, handler)
     signal.signal(signal.SIGTERM, handler)
+    return wakeup_r, wakeup_w
+
+
+def drain_wakeup_fd(fd: int) -> None:
+    try:
+        while os.read(fd, 4096):
+            pass
+    except BlockingIOError:
+        pass
 
 
 def init_log_writer(path: Path) -> Tuple[csv.writer, object]:
     path.parent.mkdir(parents=True, exist_ok=True)
     file_exists = path.exists() and path.stat().st_size > 0
-    log_file = path.open("a", newline="", encoding="utf-8")
+    log_file = path.open("a", newline="", encoding="utf-8", buffering=LOG_BUFFER_SIZE)
     writer = csv.writer(log_file)
     if not file_exists:
         writer.writerow(["timestamp", "status", "error", "attempt_duration_ms"])
@@ -217,6 +368,22 @@ def init_log_writer(path: Path) -> Tuple[csv.writer, object]:
     return writer, log_file
 
 
+def check_writable(path: Path) -> None:
+    """Raise unless `path` can be appended to, creating only its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    target = path if path.exists() else path.parent
+    if not os.access(target, os.W_OK):
+        raise PermissionError(f"Cannot write to {path}")
+
+
+def csv_field(value: str) -> str:
+    # Same rule as csv.QUOTE_MINIMAL: quote only when the field would otherwise
+    # break the row, doubling any embedded quotes.
+    if "," in value or '"' in value or "\n" in value or "\r" in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
 def log_result(
     writer: csv.writer,
     log_file,
@@ -224,91 +391,364 @@ def log_result(
     success: bool,
     error: Optional[str],
     duration_seconds: float,
+) -> None:
+    # Every column except the error is known to be CSV-safe, so the row is
+    # written as one pre-formatted line instead of going through csv.writer.
+    log_file.write(
+        f"{event_time.isoformat()},{STATUS_LABELS[success]},"
+        f"{csv_field(error) if error else ''},{duration_seconds * 1000:.3f}\r\n"
+    )
+
+
+def log_result_csv(
+    writer: csv.writer,
+    log_file,
+    event_time: datetime,
+    success: bool,
+    error: Optional[str],
+    duration_seconds: float,
 ) -> None:
     writer.writerow(
         [
             event_time.isoformat(),
-            "success" if success else "failure",
+            STATUS_LABELS[success],
             error or "",
             f"{duration_seconds * 1000:.3f}",
         ]
     )
-    log_file.flush()
 
 
-def probe_loop(args: argparse.Namespace) -> None:
-    stop_flag = {"stop": False}
-    setup_signal_handler(stop_flag)
+class AsyncLogWriter:
+    """Writes attempt rows on a daemon thread so disk latency never delays a probe.
+
+    Error-log lines go through the same thread; the error log is only opened
+    when the first one arrives, and falls back to stderr if that fails.
+    """
+
+    _SENTINEL = object()
+
+    def __init__(
+        self,
+        writer: csv.writer,
+        log_file,
+        write_row,
+        flush_interval: float,
+        error_log_path: Path,
+    ) -> None:
+        self._writer = writer
+        self._log_file = log_file
+        self._write_row = write_row
+        self._flush_interval = flush_interval
+        self._error_log_path = error_log_path
+        self._error_log = None
+        self._error_log_failed = False
+        self._queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="probe-log-writer", daemon=True)
+        self.dropped = 0
+        # Set when writing fails (e.g. disk full); later rows are dropped.
+        self.error: Optional[BaseException] = None
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def put(
+        self,
+        event_time: datetime,
+        success: bool,
+        error: Optional[str],
+        duration_seconds: float,
+    ) -> None:
+        # Never block the probe on a stalled disk; count the rows we had to drop.
+        if self.error is not None:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((event_time, success, error, duration_seconds))
+        except queue.Full:
+            self.dropped += 1
+
+    def put_error(self, line: str) -> None:
+        # Rare (once per downtime interval), so never worth dropping: write
+        # it to stderr if the thread can't take it.
+        if self.error is None:
+            try:
+                self._queue.put_nowait(line)
+                return
+            except queue.Full:
+                pass
+        print(line, file=sys.stderr)
+
+    def close(self) -> None:
+        # The writer keeps draining after a failure, but never wait on a
+        # full queue for a thread that is no longer there to empty it.
+        while self._thread.is_alive():
+            try:
+                self._queue.put(self._SENTINEL, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopped = False
+        try:
+            stopped = self._write_rows()
+            self._log_file.flush()
+        except Exception as exc:
+            self.error = exc
+            # Discard what is still queued so close() can always hand over
+            # the sentinel.
+            while not stopped:
+                item = self._queue.get()
+                if item is self._SENTINEL:
+                    stopped = True
+                elif item.__class__ is str:
+                    print(item, file=sys.stderr)
+                else:
+                    self.dropped += 1
+        finally:
+            if self._error_log is not None:
+                self._error_log.close()
+
+    def _write_error(self, line: str) -> None:
+        if self._error_log is None and not self._error_log_failed:
+            try:
+                self._error_log_path.parent.mkdir(parents=True, exist_ok=True)
+                self._error_log = self._error_log_path.open("a", encoding="utf-8")
+            except OSError as exc:
+                self._error_log_failed = True
+                print(f"Cannot open {self._error_log_path}: {exc}", file=sys.stderr)
+        if self._error_log is None:
+            print(line, file=sys.stderr)
+            return
+        self._error_log.write(line + "\n")
+        self._error_log.flush()
+
+    def _write_rows(self) -> bool:
+        last_flush = time.monotonic()
+        last_success = True
+        while True:
+            item = self._queue.get()
+            if item is self._SENTINEL:
+                return True
+            if item.__class__ is str:
+                self._write_error(item)
+                continue
+            event_time, success, error, duration_seconds = item
+            self._write_row(
+                self._writer, self._log_file, event_time, success, error, duration_seconds
+            )
+            # Flush as soon as the database recovers so the boundary of a
+            # downtime interval always reaches disk.
+            recovered = success and not last_success
+            last_success = success
+            current = time.monotonic()
+            if recovered or current - last_flush >= self._flush_interval:
+                self._log_file.flush()
+                last_flush = current
+
+
+def probe_loop(args: argparse.Namespace, table: sql.Identifier) -> None:
+    error_log_path = Path(args.error_log_file).expanduser().resolve()
+
+    # A one-element list is the cheapest mutable flag to test every iteration.
+    stop_flag = [False]
+    wakeup_r, wakeup_w = setup_signal_handler(stop_flag)
 
-    table_identifier = split_table_identifier(args.table_name)
     log_path = Path(args.log_file).expanduser().resolve()
     writer, log_file = init_log_writer(log_path)
+    log_writer = AsyncLogWriter(
+        writer,
+        log_file,
+        log_result_csv if args.use_csv_writer else log_result,
+        args.flush_interval,
+        error_log_path,
+    )
+    log_writer.start()
 
     stats = ProbeStats()
     downtime_tracker = DowntimeTracker()
 
+    # Local bindings keep the per-attempt work free of global and attribute lookups.
+    now = datetime.now
+    local_tz = LOCAL_TZ
+    perf_counter_ns = time.perf_counter_ns
+    wait_readable = select.select
+    record = downtime_tracker.record
+    log_row = log_writer.put
+
+    pool = open_pool(args) if args.use_pool else None
     insert_stmt = None
+    # The connection, its cursor and its pipeline share one ExitStack so they
+    # are always torn down together, innermost first.
+    session: Optional[ExitStack] = None
     conn: Optional[psycopg.Connection] = None
-    bootstrap_attempted = False
+    cur: Optional[psycopg.Cursor] = None
+    pipeline: Optional[psycopg.Pipeline] = None
+    prepared = False
+    # main() has already created the table; it is only re-checked after a
+    # failure, since an upgrade may have dropped it along with the connection.
+    needs_bootstrap = False
+
+    # Attempts buffered until the next send; each entry is the attempt time.
+    pending: List[datetime] = []
+    # Attempts sent through the pipeline but not yet synced.
+    in_flight: List[datetime] = []
+
+    # All loop timing uses integer nanoseconds from one clock; attempts are
+    # scheduled against an absolute deadline so sleep rounding never drifts.
+    interval_ns = int(args.interval * 1e9)
+    batch_budget_ns = interval_ns * args.batch_size
+
+    # Hoist the remaining argparse lookups out of the loop.
+    label = args.probe_label
+    batch_size = args.batch_size
+    pipeline_depth = args.pipeline_depth
+    max_attempts = args.max_attempts or (1 << 62)
+
+    deadline = perf_counter_ns()
+    last_flush = deadline
 
     try:
-        while not stop_flag["stop"]:
-            iteration_start = time.monotonic()
-            attempt_time = datetime.now(LOCAL_TZ)
-            if args.max_attempts and stats.total_attempts >= args.max_attempts:
-                break
-
-            success = False
-            error_message = None
+        while True:
+            iteration_start = perf_counter_ns()
+            deadline += interval_ns
+            stopping = (
+                stop_flag[0]
+                or stats.total_attempts + len(in_flight) + len(pending) >= max_attempts
+            )
+            if not stopping:
+                pending.append(now(local_tz))
 
-            try:
-                if conn is None:
-                    conn = open_connection(args)
-                    insert_stmt = build_insert(table_identifier)
-                if not bootstrap_attempted:
-                    ensure_table(conn, table_identifier)
-                    bootstrap_attempted = True
-
-                with conn.cursor() as cur:
-                    cur.execute(insert_stmt, (attempt_time, args.probe_label, None))
-
-                success = True
-                stats.success_count += 1
-            except Exception as exc:  # broad to include connection errors
-                error_message = str(exc)
-                stats.failure_count += 1
-                if conn is not None:
-                    try:
-                        conn.close()
-                    except Exception:  # pragma: no cover - defensive cleanup
-                        pass
+            flush_due = (pending or in_flight) and (
+                stopping
+                or len(pending) >= batch_size
+                or iteration_start - last_flush >= batch_budget_ns
+            )
+            if flush_due:
+                send_start = perf_counter_ns()
+                success = False
+                error_message = None
+                resolved: List[datetime] = []
+
+                try:
+                    if conn is None:
+                        session = ExitStack()
+                        conn = checkout(args, pool, session)
+                        cur = session.enter_context(conn.cursor())
+                        insert_stmt = build_insert(conn, table)
+                        pipeline = session.enter_context(conn.pipeline())
+                        prepared = False
+                        if needs_bootstrap:
+                            ensure_table(conn, table)
+                            needs_bootstrap = False
+
+                    if pending:
+                        rows = [(attempt_time, label, None) for attempt_time in pending]
+                        if len(rows) == 1:
+                            # The first execute on a fresh connection prepares the INSERT;
+                            # psycopg reuses the server-side plan for every later call.
+                            cur.execute(
+                                insert_stmt,
+                                rows[0],
+                                prepare=True if not prepared else None,
+                            )
+                            prepared = True
+                        else:
+                            # executemany prepares the statement itself.
+                            cur.executemany(insert_stmt, rows)
+                        in_flight.extend(pending)
+                        pending.clear()
+                        last_flush = perf_counter_ns()
+
+                    # Results are only awaited once the pipeline is deep enough,
+                    # so several inserts share a single network round-trip.
+                    if stopping or len(in_flight) >= pipeline_depth:
+                        pipeline.sync()
+                        resolved, in_flight = in_flight, []
+                        success = True
+                except Exception as exc:  # broad to include connection errors
+                    # Formatting psycopg errors is expensive, so rows only carry the
+                    # exception type; the full detail is kept once per downtime interval.
+                    error_message = type(exc).__name__
+                    if session is not None:
+                        try:
+                            session.close()
+                        except Exception:  # pragma: no cover - defensive cleanup
+                            pass
+                    session = None
                     conn = None
+                    cur = None
+                    pipeline = None
                     insert_stmt = None
-
-            stats.total_attempts += 1
-            downtime_tracker.record(attempt_time, success)
-
-            duration = time.monotonic() - iteration_start
-            log_result(writer, log_file, attempt_time, success, error_message, duration)
+                    needs_bootstrap = True
+
+                    # An error aborts the rest of the pipeline, so every attempt
+                    # that has not been confirmed is counted as failed.
+                    resolved = in_flight + pending
+                    in_flight = []
+                    pending.clear()
+                    last_flush = perf_counter_ns()
+
+                    if not downtime_tracker.in_downtime:
+                        log_writer.put_error(f"{resolved[0].isoformat()} {exc!r}")
+
+                # An attempt's duration is the round-trip of the flush that
+                # resolved it (connect, send and sync), not the time it sat
+                # unconfirmed in the pipeline while earlier flushes ran.
+                duration_seconds = (perf_counter_ns() - send_start) / 1e9
+                for attempt_time in resolved:
+                    stats.total_attempts += 1
+                    if success:
+                        stats.success_count += 1
+                    else:
+                        stats.failure_count += 1
+                    record(attempt_time, success)
+                    log_row(attempt_time, success, error_message, duration_seconds)
 
             # Failure details are captured in the log file; avoid spamming stderr to
             # make long-running output easier to read during maintenance windows.
 
-            sleep_time = args.interval - duration
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            if stopping:
+                break
+
+            remaining_ns = deadline - perf_counter_ns()
+            if remaining_ns > 0:
+                if wait_readable([wakeup_r], [], [], remaining_ns / 1e9)[0]:
+                    drain_wakeup_fd(wakeup_r)
+            elif remaining_ns < -interval_ns:
+                # More than a full interval behind (e.g. a slow reconnect):
+                # restart the schedule instead of bursting to catch up.
+                deadline = perf_counter_ns()
 
     finally:
         end_time = datetime.now(LOCAL_TZ)
         downtime_tracker.finalize(end_time)
         if conn is not None:
             try:
-                truncate_table(conn, table_identifier)
+                truncate_table(conn, table)
+                pipeline.sync()
             except Exception:
                 pass
-        log_file.close()
-        if conn is not None:
-            conn.close()
+        log_writer.close()
+        stats.dropped_log_rows = log_writer.dropped
+        if log_writer.error is not None:
+            print(f"Writing the CSV log failed: {log_writer.error!r}", file=sys.stderr)
+        try:
+            log_file.close()
+        except OSError as exc:
+            if log_writer.error is None:
+                print(f"Writing the CSV log failed: {exc!r}", file=sys.stderr)
+        if session is not None:
+            try:
+                session.close()
+            except Exception:  # pragma: no cover - defensive cleanup
+                pass
+        if pool is not None:
+            pool.close()
+        signal.set_wakeup_fd(-1)
+        os.close(wakeup_r)
+        os.close(wakeup_w)
 
     summarize(stats, downtime_tracker)
 
@@ -318,6 +758,8 @@ def summarize(stats: ProbeStats, tracker: DowntimeTracker) -> None:
     print(f"Total attempts: {stats.total_attempts}")
     print(f"Succeeded: {stats.success_count}")
     print(f"Failed: {stats.failure_count}")
+    if stats.dropped_log_rows:
+        print(f"Log rows dropped (writer fell behind): {stats.dropped_log_rows}")
 
     if tracker.intervals:
         print("\nDowntime intervals detected (America/New_York):")
@@ -333,7 +775,17 @@ def summarize(stats: ProbeStats, tracker: DowntimeTracker) -> None:
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     args = parse_args(argv)
-    table_identifier = split_table_identifier(args.table_name)
+    # Parse and build the identifier once; every statement reuses the same object.
+    table = sql.Identifier(*split_table_identifier(args.table_name))
+
+    if not args.create_table_only:
+        # Checked up front rather than on the first failed probe; the file
+        # itself is only created once there is something to put in it.
+        try:
+            check_writable(Path(args.error_log_file).expanduser().resolve())
+        except OSError as exc:
+            print(f"Cannot write the error log: {exc}", file=sys.stderr)
+            return 2
 
     try:
         conn = open_connection(args)
@@ -342,8 +794,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         return 2
 
     try:
-        ensure_table(conn, table_identifier)
-        truncate_table(conn, table_identifier)
+        ensure_table(conn, table)
+        truncate_table(conn, table)
         print(
             f"Table '{args.table_name}' is ready.\n"
             f"Using probe label '{args.probe_label}' and logging to '{args.log_file}'."
@@ -354,7 +806,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     if args.create_table_only:
         return 0
 
-    probe_loop(args)
+    probe_loop(args, table)
     return 0
 
 
@@ -5,26 +5,46 @@ Manual test runner for community sync scripts.
 This script helps you quickly test different scenarios interactively.
 """
 
+import shlex
 import subprocess
 import sys
+import time
 from pathlib import Path
 
-TEST_DIR = Path("/tmp/test-community-sync")
+_SRC_DIR = str(Path(__file__).parent)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from setup_repos import TEST_DIR
+
 ENTERPRISE_REPO = TEST_DIR / "enterprise-repo"
 
+# Remote name -> time.monotonic() of its last successful fetch
+_last_fetch: dict[str, float] = {}
+
 
 def run(cmd, cwd=None, check=True):
-    """Run shell command."""
-    print(f"\n💻 Running: {cmd}\n")
+    """Run an argument list, or a string through the shell (for the scripts)."""
+    print(f"\n💻 Running: {cmd if isinstance(cmd, str) else shlex.join(cmd)}\n")
     result = subprocess.run(
         cmd,
-        shell=True,
+        shell=isinstance(cmd, str),
         cwd=cwd,
         check=check,
     )
     return result
 
 
+def maybe_fetch(remote, cwd, ttl=5.0, check=True):
+    """Fetch `remote` unless it was fetched less than `ttl` seconds ago."""
+    last = _last_fetch.get(remote)
+    if last is not None and time.monotonic() - last < ttl:
+        return
+    result = run(["git", "fetch", remote], cwd=cwd, check=check)
+    if result.returncode == 0:
+        _last_fetch[remote] = time.monotonic()
+
+
 def show_git_state():
     """Show current git state of enterprise repo."""
     print("\n" + "=" * 60)
@@ -36,11 +56,11 @@ def show_git_state():
         return
 
     print("\n📝 Commit log (last 10 commits):")
-    run("git log --oneline --graph --decorate -10", cwd=ENTERPRISE_REPO)
+    run(["git", "log", "--oneline", "--graph", "--decorate", "-10"], cwd=ENTERPRISE_REPO)
 
     print("\n🔄 Remote comparison:")
-    run("git fetch community", cwd=ENTERPRISE_REPO, check=False)
-    run("git log --oneline HEAD..community/main", cwd=ENTERPRISE_REPO, check=False)
+    maybe_fetch("community", ENTERPRISE_REPO, check=False)
+    run(["git", "log", "--oneline", "HEAD..community/main"], cwd=ENTERPRISE_REPO, check=False)
 
     print("\n" + "=" * 60)
 
@@ -95,6 +115,8 @@ def main():
                 f"python {test_base / 'src' / 'setup_repos.py'} add-commits {count}",
                 check=False,
             )
+            # Community just moved; the next fetch must hit the remote
+            _last_fetch.pop("community", None)
             if result.returncode == 0:
                 show_git_state()
 
@@ -102,8 +124,8 @@ def main():
             max_commits = {"5": 1, "6": 3, "7": 5}[choice]
             print(f"\n🔄 Syncing up to {max_commits} commit(s)...")
 
-            # Fetch first
-            run("git fetch community", cwd=ENTERPRISE_REPO)
+            # Fetch first (skipped if show_git_state just fetched)
+            maybe_fetch("community", ENTERPRISE_REPO)
 
             # Run sync with skip-validation
             cmd = f"{rebase_script} --skip-validation --max-commits {max_commits}"
@@ -121,8 +143,8 @@ def main():
             # This creates a commit that will likely conflict with community changes
             conflict_file = ENTERPRISE_REPO / "README.md"
             conflict_file.write_text("# Conflicting change from enterprise\n")
-            run("git add README.md", cwd=ENTERPRISE_REPO)
-            run("git commit -m 'enterprise: conflicting change'", cwd=ENTERPRISE_REPO)
+            run(["git", "add", "README.md"], cwd=ENTERPRISE_REPO)
+            run(["git", "commit", "-m", "enterprise: conflicting change"], cwd=ENTERPRISE_REPO)
             print("\n✅ Conflicting commit created!")
             show_git_state()
 
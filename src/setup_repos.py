@@ -10,103 +10,249 @@ Creates:
 """
 
 import os
+import shlex
 import shutil
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-TEST_DIR = Path("/tmp/test-community-sync")
+# Prefer tmpfs so git's fsyncs never reach a disk; fall back to /tmp where
+# /dev/shm is missing or not writable (e.g. macOS).
+_TEST_BASE = "/dev/shm" if os.access("/dev/shm", os.W_OK) else "/tmp"
+# Overridable so parallel runs can each use their own tree; a "{pid}" in the
+# value is replaced with the current process id.
+TEST_DIR = Path(os.environ.get("TEST_DIR", f"{_TEST_BASE}/test-community-sync")
+                .format(pid=os.getpid()))
+COMMUNITY_COMMITTER = "Community Bot <community@test.com>"
+VERBOSE = bool(os.environ.get("VERBOSE"))
 
+# Throwaway repos: never fsync and never auto-gc
+REPO_CONFIG = {"core.fsync": "none", "gc.auto": "0"}
 
-def run(cmd, cwd=None, check=True):
-    """Run shell command and return output."""
-    print(f"  $ {cmd}")
+
+def clone_config(name, email):
+    """`git clone -c` arguments for REPO_CONFIG plus the repo's identity.
+
+    Setting user.* at clone time keeps it in the repo for later commits (e.g.
+    by the sync scripts) without a separate `git config` process per key.
+    """
+    config = {**REPO_CONFIG, "user.name": name, "user.email": email}
+    return [arg for key, value in config.items() for arg in ("-c", f"{key}={value}")]
+
+
+def run(argv, cwd=None, check=True, capture=False):
+    """Run a command given as an argument list (no shell) and return output.
+
+    Stdout is discarded unless `capture` is set; VERBOSE=1 echoes captured
+    stdout. Stderr is always kept and printed if a checked command fails.
+    """
+    print(f"  $ {shlex.join(argv)}")
     result = subprocess.run(
-        cmd,
-        shell=True,
+        argv,
         cwd=cwd,
-        capture_output=True,
+        stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
         text=True,
-        check=check,
     )
-    if result.stdout:
+    if VERBOSE and result.stdout:
         print(f"    {result.stdout.strip()}")
+    if check and result.returncode != 0:
+        if result.stderr:
+            print(f"    {result.stderr.strip()}")
+        raise subprocess.CalledProcessError(result.returncode, argv, result.stdout, result.stderr)
     return result
 
 
-def setup_test_repos():
-    """Create test repository structure."""
-    print("🧹 Cleaning up old test repos...")
-    if TEST_DIR.exists():
-        shutil.rmtree(TEST_DIR)
-    TEST_DIR.mkdir(parents=True)
-
-    print("\n📦 Creating community repository...")
-    community_origin = TEST_DIR / "community-origin"
-    community_repo = TEST_DIR / "community-repo"
-
+def git(*args, cwd=None, check=True, capture=False):
+    """Run git with `-C <cwd>` so the child process itself needs no chdir."""
+    argv = ["git", "-C", str(cwd), *args] if cwd is not None else ["git", *args]
+    return run(argv, check=check, capture=capture)
+
+
+def fast_import(repo, ref, commits, committer, parent=None, env=None):
+    """Write a linear series of commits to `ref` with a single git fast-import.
+
+    Each commit adds one file; `parent` is the ref the series starts from and
+    `env` the environment git runs with (default: inherited).
+    """
+    chunks = []
+    for index, (filename, content, message) in enumerate(commits):
+        message_bytes = message.encode() + b"\n"
+        content_bytes = content.encode()
+        chunks.append(f"commit {ref}\ncommitter {committer} now\n".encode())
+        chunks.append(b"data %d\n%s" % (len(message_bytes), message_bytes))
+        if index == 0 and parent is not None:
+            chunks.append(f"from {parent}^0\n".encode())
+        chunks.append(f"M 100644 inline {filename}\n".encode())
+        chunks.append(b"data %d\n%s\n" % (len(content_bytes), content_bytes))
+    stream = b"".join(chunks) + b"done\n"
+
+    argv = ["git", "-C", str(repo), "fast-import", "--quiet", "--date-format=now", "--done"]
+    print(f"  $ {shlex.join(argv)}  # {len(commits)} commits -> {ref}")
+    subprocess.run(argv, input=stream, check=True, env=env)
+
+
+def commit_series(repo, commits, name, email):
+    """Commit each (filename, content, message) on top of main and check it out."""
+    fast_import(repo, "refs/heads/main", commits, f"{name} <{email}>",
+                parent="refs/heads/main")
+    git("reset", "--hard", "--quiet", cwd=repo)
+
+
+def fast_rm(path):
+    """Remove a directory tree without waiting for it.
+
+    The tree is renamed out of the way (so `path` can be reused at once) and
+    deleted by a detached `rm -rf`; falls back to shutil.rmtree if the rename
+    is not possible.
+    """
+    path = Path(path)
+    trash = path.with_name(f"{path.name}.trash.{os.getpid()}.{time.time_ns()}")
+    try:
+        os.rename(path, trash)
+    except FileNotFoundError:
+        return
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    subprocess.Popen(["rm", "-rf", str(trash)], start_new_session=True,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _copy_file(src, dst, size):
+    """Copy file contents in the kernel where possible."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if hasattr(os, "copy_file_range"):
+            try:
+                remaining = size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return
+            except OSError:
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+
+
+def fast_copytree(src, dst):
+    """Copy a directory tree, hardlinking files where possible.
+
+    Stats each entry once via os.scandir and makes *.sh files executable as
+    part of the same walk. Files that would need a mode change are copied
+    rather than linked so the source is never modified.
+    """
+    os.makedirs(dst)
+    with os.scandir(src) as entries:
+        for entry in entries:
+            d = os.path.join(dst, entry.name)
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), d)
+                continue
+            if entry.is_dir():
+                fast_copytree(entry.path, d)
+                continue
+            st = entry.stat()
+            mode = st.st_mode & 0o7777
+            if entry.name.endswith(".sh"):
+                mode |= 0o755
+            if mode == st.st_mode & 0o7777:
+                try:
+                    os.link(entry.path, d)
+                    continue
+                except OSError:
+                    pass
+            _copy_file(entry.path, d, st.st_size)
+            os.chmod(d, mode)
+
+
+def init_bare(path):
+    """Create a bare repo to push into, with fsync and auto-gc disabled."""
+    git("init", "--bare", str(path))
+    # Appended directly rather than via `git config` to save a process
+    with open(path / "config", "a") as config:
+        config.write("[core]\n\tfsync = none\n[gc]\n\tauto = 0\n"
+                     "[receive]\n\tautogc = false\n")
+
+
+def setup_community(community_origin, community_repo):
+    """Create the community origin and clone, and push the initial history."""
     # Create bare origin repo
-    run(f"git init --bare {community_origin}")
+    init_bare(community_origin)
 
     # Create and populate community repo
-    run(f"git clone {community_origin} {community_repo}")
+    git("clone", *clone_config("Community Bot", "community@test.com"),
+        str(community_origin), str(community_repo))
 
-    # Initial commit
-    run("git config user.name 'Community Bot'", cwd=community_repo)
-    run("git config user.email 'community@test.com'", cwd=community_repo)
+    # Initial commit plus some community commits, written in one fast-import
+    # and then checked out
+    commits = [("README.md", "# Community Repo\n", "Initial commit")]
+    commits += [(f"feature{i}.txt", f"Feature {i}\n", f"feat: add feature {i}")
+                for i in range(1, 4)]
+    fast_import(community_repo, "refs/heads/main", commits, COMMUNITY_COMMITTER)
+    git("reset", "--hard", "--quiet", cwd=community_repo)
 
-    (community_repo / "README.md").write_text("# Community Repo\n")
-    run("git add README.md", cwd=community_repo)
-    run("git commit -m 'Initial commit'", cwd=community_repo)
-    run("git push origin main", cwd=community_repo)
+    git("push", "--no-verify", "--atomic", "origin", "main", cwd=community_repo)
 
-    # Add some community commits
-    for i in range(1, 4):
-        (community_repo / f"feature{i}.txt").write_text(f"Feature {i}\n")
-        run(f"git add feature{i}.txt", cwd=community_repo)
-        run(f"git commit -m 'feat: add feature {i}'", cwd=community_repo)
 
-    run("git push origin main", cwd=community_repo)
+def setup_enterprise_base(enterprise_origin):
+    """Create the enterprise origin; needs nothing from the community side."""
+    init_bare(enterprise_origin)
 
-    print("\n📦 Creating enterprise repository...")
+
+def setup_test_repos():
+    """Create test repository structure."""
+    print("🧹 Cleaning up old test repos...")
+    fast_rm(TEST_DIR)
+    TEST_DIR.mkdir(parents=True)
+
+    community_origin = TEST_DIR / "community-origin"
+    community_repo = TEST_DIR / "community-repo"
     enterprise_origin = TEST_DIR / "enterprise-origin"
     enterprise_repo = TEST_DIR / "enterprise-repo"
 
-    # Create bare origin repo
-    run(f"git init --bare {enterprise_origin}")
+    # The enterprise origin is independent of the community history, so
+    # create it while the community repo is being populated.
+    print("\n📦 Creating community repository...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        community = executor.submit(setup_community, community_origin, community_repo)
+        enterprise = executor.submit(setup_enterprise_base, enterprise_origin)
+        community.result()
+        enterprise.result()
+
+    print("\n📦 Creating enterprise repository...")
 
-    # Clone from community to start with same history
-    run(f"git clone {community_origin} {enterprise_repo}")
+    # Clone from community to start with same history. --shared borrows the
+    # community objects through alternates instead of copying them (safe as
+    # the origins never gc), and the worktree is left for commit_series()
+    # below to check out.
+    git("clone", "--local", "--shared", "--no-checkout",
+        *clone_config("Enterprise Bot", "enterprise@test.com"),
+        str(community_origin), str(enterprise_repo))
 
     # Repoint origin to enterprise-origin
-    run(f"git remote set-url origin {enterprise_origin}", cwd=enterprise_repo)
-
-    # Configure git
-    run("git config user.name 'Enterprise Bot'", cwd=enterprise_repo)
-    run("git config user.email 'enterprise@test.com'", cwd=enterprise_repo)
+    git("remote", "set-url", "origin", str(enterprise_origin), cwd=enterprise_repo)
 
     # Add community remote
-    run(f"git remote add community {community_origin}", cwd=enterprise_repo)
-    run("git fetch community", cwd=enterprise_repo)
-
-    # Add .gitignore to ignore scripts symlink that will be added later
-    (enterprise_repo / ".gitignore").write_text("scripts\n")
-    run("git add .gitignore", cwd=enterprise_repo)
-    run("git commit -m 'chore: ignore scripts symlink'", cwd=enterprise_repo)
-
-    # Add enterprise patches on top
-    (enterprise_repo / "enterprise-config.txt").write_text("Enterprise config\n")
-    run("git add enterprise-config.txt", cwd=enterprise_repo)
-    run("git commit -m 'feat: add enterprise configuration'", cwd=enterprise_repo)
+    git("remote", "add", "community", str(community_origin), cwd=enterprise_repo)
+    git("fetch", "--no-tags", "community", cwd=enterprise_repo)
 
-    (enterprise_repo / "enterprise-auth.txt").write_text("Enterprise auth\n")
-    run("git add enterprise-auth.txt", cwd=enterprise_repo)
-    run("git commit -m 'feat: add enterprise authentication'", cwd=enterprise_repo)
+    # Add .gitignore to ignore scripts symlink that will be added later,
+    # then the enterprise patches on top
+    commit_series(enterprise_repo, [
+        (".gitignore", "scripts\n", "chore: ignore scripts symlink"),
+        ("enterprise-config.txt", "Enterprise config\n", "feat: add enterprise configuration"),
+        ("enterprise-auth.txt", "Enterprise auth\n", "feat: add enterprise authentication"),
+    ], "Enterprise Bot", "enterprise@test.com")
 
     # Push to enterprise origin
-    run("git push origin main", cwd=enterprise_repo)
+    git("push", "--no-verify", "--atomic", "origin", "main", cwd=enterprise_repo)
 
     # Copy scripts to enterprise repo using ENTERPRISE_REPO from environment
-    import os
     enterprise_repo_source = os.environ.get('ENTERPRISE_REPO')
     if enterprise_repo_source:
         scripts_dir = Path(enterprise_repo_source) / "scripts"
@@ -114,10 +260,7 @@ def setup_test_repos():
             enterprise_scripts = enterprise_repo / "scripts"
             if enterprise_scripts.exists():
                 shutil.rmtree(enterprise_scripts)
-            shutil.copytree(scripts_dir, enterprise_scripts)
-            # Make scripts executable
-            for script_file in enterprise_scripts.glob("*.sh"):
-                script_file.chmod(0o755)
+            fast_copytree(scripts_dir, enterprise_scripts)
             print("✅ Scripts copied to enterprise test repo")
         else:
             print(f"⚠️  Scripts directory not found at {scripts_dir}")
@@ -147,17 +290,14 @@ def add_community_commits(count=3):
     print(f"\n📝 Adding {count} new commits to community repo...")
 
     # Get current commit count for unique file names
-    result = run("git rev-list --count HEAD", cwd=community_repo)
+    result = git("rev-list", "--count", "HEAD", cwd=community_repo, capture=True)
     start_num = int(result.stdout.strip()) + 1
 
-    for i in range(count):
-        file_num = start_num + i
-        filename = f"update{file_num}.txt"
-        (community_repo / filename).write_text(f"Update {file_num}\n")
-        run(f"git add {filename}", cwd=community_repo)
-        run(f"git commit -m 'feat: add update {file_num}'", cwd=community_repo)
+    commits = [(f"update{file_num}.txt", f"Update {file_num}\n", f"feat: add update {file_num}")
+               for file_num in range(start_num, start_num + count)]
+    commit_series(community_repo, commits, "Community Bot", "community@test.com")
 
-    run("git push origin main", cwd=community_repo)
+    git("push", "--no-verify", "--atomic", "origin", "main", cwd=community_repo)
 
     print(f"\n✅ Added {count} commits to community repo")
     print("\nTo sync to enterprise:")
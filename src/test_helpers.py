@@ -6,13 +6,19 @@ Provides functions to verify expected vs actual git states,
 create test scenarios, and report results.
 """
 
+import shlex
 import subprocess
 import sys
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
-TEST_DIR = Path("/tmp/test-community-sync")
+_SRC_DIR = str(Path(__file__).parent)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from setup_repos import TEST_DIR, git, run, setup_test_repos
+
 COMMUNITY_REPO = TEST_DIR / "community-repo"
 ENTERPRISE_REPO = TEST_DIR / "enterprise-repo"
 
@@ -20,7 +26,7 @@ ENTERPRISE_REPO = TEST_DIR / "enterprise-repo"
 @dataclass
 class GitState:
     """Represents the state of a git repository."""
-    commits: List[str]  # List of commit SHAs
+    commit_count: int  # Commits reachable from HEAD
     head_sha: str
     branch: str
     tags: List[str]
@@ -39,61 +45,109 @@ class TestResult:
     actual: Optional[Dict] = None
 
 
-def run(cmd, cwd=None, check=True, capture_output=True):
-    """Run shell command and return result."""
-    result = subprocess.run(
-        cmd,
-        shell=True,
-        cwd=cwd,
-        check=check,
-        capture_output=capture_output,
-        text=True,
-    )
-    return result
+# Every field of GitState in one shell invocation instead of one git process
+# each; `set -e` keeps the old behaviour of failing if any query fails.
+# Cleanliness is the diff-index exit status (after refreshing stale index
+# stat data) plus any untracked files, which is what `git status --porcelain`
+# reported without rendering the full status.
+_GIT_STATE_SCRIPT = (
+    "set -e; "
+    "git rev-list --count HEAD; echo __SEP__; "
+    "git rev-parse HEAD; echo __SEP__; "
+    "git branch --show-current; echo __SEP__; "
+    "git tag -l; echo __SEP__; "
+    "git update-index -q --refresh >/dev/null || true; "
+    "rc=0; git diff-index --quiet HEAD -- || rc=$?; test $rc -le 1; echo $rc; "
+    "git ls-files --others --exclude-standard --directory --no-empty-directory; "
+    "echo __SEP__; "
+    "git rev-list --count {ref}..HEAD"
+)
+
+
+# (repo_path, ref) -> (_state_key at query time, GitState)
+_state_cache: Dict[Tuple[Path, str], Tuple[tuple, GitState]] = {}
+
+
+def _state_key(repo_path: Path) -> Optional[tuple]:
+    """Cheap fingerprint of HEAD, the index and the refs GitState reads.
+
+    Edits to tracked files that git has not seen yet do not change it, so
+    callers invalidate explicitly after running anything that touches the
+    worktree (see invalidate_git_state).
+    """
+    git_dir = repo_path / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text()
+    except OSError:
+        return None
+    paths = [git_dir / "HEAD", git_dir / "index", git_dir / "packed-refs", git_dir / "refs" / "tags"]
+    if head.startswith("ref: "):
+        paths.append(git_dir / head[len("ref: "):].strip())
+    key = [head]
+    for path in paths:
+        try:
+            key.append(path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            key.append(None)
+    return tuple(key)
+
+
+def invalidate_git_state(repo_path: Optional[Path] = None):
+    """Drop cached get_git_state results for one repository, or all of them."""
+    for cached in list(_state_cache):
+        if repo_path is None or cached[0] == repo_path:
+            del _state_cache[cached]
 
 
 def get_git_state(repo_path: Path, ref: str = "HEAD") -> GitState:
-    """Get current git state of a repository."""
+    """Get current git state of a repository.
+
+    Results for the default ref are reused while _state_key(repo_path) is
+    unchanged; the key does not cover other refs, so those always re-query.
+    """
     if not repo_path.exists():
         raise FileNotFoundError(f"Repository not found: {repo_path}")
 
-    # Get commit list
-    result = run("git rev-list --reverse HEAD", cwd=repo_path)
-    commits = result.stdout.strip().split('\n') if result.stdout.strip() else []
-
-    # Get HEAD SHA
-    head_result = run("git rev-parse HEAD", cwd=repo_path)
-    head_sha = head_result.stdout.strip()
-
-    # Get current branch
-    branch_result = run("git branch --show-current", cwd=repo_path)
-    branch = branch_result.stdout.strip()
-
-    # Get tags
-    tags_result = run("git tag -l", cwd=repo_path)
-    tags = tags_result.stdout.strip().split('\n') if tags_result.stdout.strip() else []
-
-    # Check if working directory is clean
-    diff_result = run("git status --porcelain", cwd=repo_path)
-    is_clean = len(diff_result.stdout.strip()) == 0
-
-    # Get ahead/behind counts
-    ahead_behind = run(f"git rev-list --count {ref}..HEAD", cwd=repo_path)
-    ahead = int(ahead_behind.stdout.strip()) if ahead_behind.stdout.strip() else 0
-
-    return GitState(
-        commits=commits,
-        head_sha=head_sha,
-        branch=branch,
+    cacheable = ref == "HEAD"
+    cached = _state_cache.get((repo_path, ref)) if cacheable else None
+    if cached is not None and cached[0] == _state_key(repo_path):
+        return cached[1]
+
+    script = _GIT_STATE_SCRIPT.format(ref=shlex.quote(ref))
+    # Read line by line instead of capturing and re-splitting the whole output
+    sections: List[List[str]] = [[]]
+    with subprocess.Popen(["sh", "-c", script], cwd=repo_path,
+                          stdout=subprocess.PIPE, text=True) as proc:
+        for line in proc.stdout:
+            if line == "__SEP__\n":
+                sections.append([])
+            else:
+                sections[-1].append(line.rstrip("\n"))
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+    count_out, head_out, branch_out, tags, status_out, ahead_out = sections
+
+    ahead = int(ahead_out[0]) if ahead_out else 0
+
+    state = GitState(
+        commit_count=int(count_out[0]),
+        head_sha=head_out[0],
+        branch=branch_out[0] if branch_out else "",
         tags=tags,
-        is_clean=is_clean,
+        is_clean=status_out == ["0"],
         ahead_count=ahead
     )
+    # Keyed after the query, which may itself refresh the index
+    key = _state_key(repo_path) if cacheable else None
+    if key is not None:
+        _state_cache[(repo_path, ref)] = (key, state)
+    return state
 
 
 def get_commit_info(repo_path: Path, commit_sha: str) -> Dict[str, str]:
     """Get detailed information about a commit."""
-    result = run(f"git show --format=%H|%s|%an|%ad --date=short {commit_sha}", cwd=repo_path)
+    result = git("show", "-s", "--format=%H|%s|%an|%ad", "--date=short", commit_sha,
+                 cwd=repo_path, capture=True)
     line = result.stdout.strip().split('\n')[0]
     parts = line.split('|')
 
@@ -108,7 +162,7 @@ def get_commit_info(repo_path: Path, commit_sha: str) -> Dict[str, str]:
 def count_commits_between(repo_path: Path, from_ref: str, to_ref: str) -> int:
     """Count commits between two references."""
     try:
-        result = run(f"git rev-list --count {from_ref}..{to_ref}", cwd=repo_path)
+        result = git("rev-list", "--count", f"{from_ref}..{to_ref}", cwd=repo_path, capture=True)
         return int(result.stdout.strip())
     except subprocess.CalledProcessError:
         return 0
@@ -216,10 +270,7 @@ def print_test_results(results: List[TestResult]) -> bool:
 
 def setup_test_scenario() -> Tuple[GitState, GitState]:
     """Setup initial test scenario and return git states."""
-    # Import setup function
-    sys.path.insert(0, str(Path(__file__).parent))
-    from setup_repos import setup_test_repos
-
+    invalidate_git_state()
     print("🔧 Setting up test repositories...")
     setup_test_repos()
 
@@ -227,7 +278,7 @@ def setup_test_scenario() -> Tuple[GitState, GitState]:
     community_state = get_git_state(COMMUNITY_REPO)
     enterprise_state = get_git_state(ENTERPRISE_REPO)
 
-    print(f"✅ Community: {len(community_state.commits)} commits")
-    print(f"✅ Enterprise: {len(enterprise_state.commits)} commits ({enterprise_state.ahead_count} patches)")
+    print(f"✅ Community: {community_state.commit_count} commits")
+    print(f"✅ Enterprise: {enterprise_state.commit_count} commits ({enterprise_state.ahead_count} patches)")
 
     return community_state, enterprise_state
\ No newline at end of file
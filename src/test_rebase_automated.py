@@ -6,15 +6,21 @@ Tests community sync rebase operations without user interaction.
 Includes setup, execution, and validation phases.
 """
 
+import multiprocessing
+import os
 import sys
+import tempfile
 from pathlib import Path
 from typing import List
 
 # Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+_SRC_DIR = str(Path(__file__).parent)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
 
+from setup_repos import add_community_commits as _add_community_commits, fast_rm
 from test_helpers import (
-    run, get_git_state, count_commits_between, validate_rebase_result,
+    run, get_git_state, invalidate_git_state, count_commits_between, validate_rebase_result,
     print_test_results, setup_test_scenario, TestResult,
     COMMUNITY_REPO, ENTERPRISE_REPO, TEST_DIR
 )
@@ -25,8 +31,7 @@ def add_community_commits(count: int) -> bool:
     print(f"\n📝 Adding {count} commits to community repo...")
 
     try:
-        from setup_repos import add_community_commits
-        add_community_commits(count)
+        _add_community_commits(count)
         print(f"✅ Added {count} commits to community repo")
         return True
     except Exception as e:
@@ -45,8 +50,10 @@ def sync_commits(max_commits: int = 3) -> bool:
         print(f"❌ Rebase script not found: {rebase_script}")
         return False
 
-    cmd = f"{rebase_script} --skip-validation --max-commits {max_commits}"
-    result = run(cmd, cwd=ENTERPRISE_REPO, check=False)
+    cmd = [str(rebase_script), "--skip-validation", "--max-commits", str(max_commits)]
+    result = run(cmd, cwd=ENTERPRISE_REPO, check=False, capture=True)
+    # The script may have rewritten the worktree in ways the cache key misses
+    invalidate_git_state(ENTERPRISE_REPO)
 
     if result.returncode == 0:
         print(f"✅ Successfully synced {max_commits} commits")
@@ -206,11 +213,26 @@ def test_multiple_sync_cycles() -> List[TestResult]:
 def cleanup_test_repos():
     """Clean up test repositories."""
     print("\n🧹 Cleaning up test repositories...")
-    if TEST_DIR.exists():
-        run(f"rm -rf {TEST_DIR}")
+    fast_rm(TEST_DIR)
     print("✅ Cleanup complete")
 
 
+TESTS = [
+    test_single_commit_sync,
+    test_batch_commit_sync,
+    test_no_commits_to_sync,
+    test_multiple_sync_cycles,
+]
+
+
+def run_one_test(test) -> List[TestResult]:
+    """Run one scenario in a pool worker and remove its TEST_DIR afterwards."""
+    try:
+        return test()
+    finally:
+        cleanup_test_repos()
+
+
 def main():
     """Run all automated rebase tests."""
     print("🚀 Automated Rebase Test Suite")
@@ -224,13 +246,18 @@ def main():
         sys.exit(1)
 
     all_results = []
+    # Every worker tree lives under one private parent, so cleanup removes
+    # exactly these and never another suite's /dev/shm/test-community-sync-*
+    TEST_DIR.parent.mkdir(parents=True, exist_ok=True)
+    workers_dir = Path(tempfile.mkdtemp(prefix=f"{TEST_DIR.name}-workers-", dir=TEST_DIR.parent))
 
     try:
-        # Run test scenarios
-        all_results.extend(test_single_commit_sync())
-        all_results.extend(test_batch_commit_sync())
-        all_results.extend(test_no_commits_to_sync())
-        all_results.extend(test_multiple_sync_cycles())
+        # Run test scenarios in parallel, each worker in its own TEST_DIR.
+        # Spawned workers import test_helpers afresh, so they pick this up.
+        os.environ["TEST_DIR"] = f"{workers_dir}/{{pid}}"
+        with multiprocessing.get_context("spawn").Pool(len(TESTS)) as pool:
+            for results in pool.map(run_one_test, TESTS):
+                all_results.extend(results)
 
         # Print results
         success = print_test_results(all_results)
@@ -249,8 +276,8 @@ def main():
         print(f"\n💥 Test execution failed: {e}")
         sys.exit(1)
     finally:
-        # Always cleanup
-        cleanup_test_repos()
+        # Always cleanup, including trees left behind by interrupted workers
+        fast_rm(workers_dir)
 
 
 if __name__ == "__main__":
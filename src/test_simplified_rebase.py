@@ -12,74 +12,145 @@ This test includes CI validation to ensure the rebase workflow works end-to-end.
 """
 
 import os
+import shlex
 import sys
 import subprocess
 import tempfile
 import shutil
+from itertools import count
 from pathlib import Path
-from datetime import datetime
+
+_SRC_DIR = str(Path(__file__).parent)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from setup_repos import fast_import
 
 # Configuration
-TEST_DIR = Path(tempfile.mkdtemp(prefix="test-community-sync-"))
+# Prefer tmpfs so git's object and index writes never hit a disk; otherwise
+# fall back to tempfile's default (TMPDIR or /tmp)
+_TMPFS = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+TEST_DIR = Path(tempfile.mkdtemp(prefix="test-community-sync-", dir=_TMPFS))
 COMMUNITY_REPO = TEST_DIR / "community-repo"
 ENTERPRISE_REPO = TEST_DIR / "enterprise-repo"
-
-def run(cmd, cwd=None, check=True, capture_output=True):
-    """Run a command and return result."""
-    print(f"🔧 Running: {cmd}")
+SCRIPTS_DIR = (Path(__file__).parent.parent / "scripts").resolve()
+REBASE_SCRIPT = SCRIPTS_DIR / "rebase-community-batch.sh"
+# (name, email) of each side; the fast-import committer lines and the git
+# environments below are both built from these
+COMMUNITY_IDENTITY = ("Community User", "community@example.com")
+ENTERPRISE_IDENTITY = ("Enterprise User", "enterprise@example.com")
+COMMUNITY_COMMITTER = "{} <{}>".format(*COMMUNITY_IDENTITY)
+ENTERPRISE_COMMITTER = "{} <{}>".format(*ENTERPRISE_IDENTITY)
+
+# Equivalent of `git -c core.fsync=none` for every git this test starts,
+# including the ones run by the rebase script; the user's global config is
+# ignored so it cannot change the outcome
+GIT_ENV = {
+    **os.environ,
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_COUNT": "1",
+    "GIT_CONFIG_KEY_0": "core.fsync",
+    "GIT_CONFIG_VALUE_0": "none",
+}
+
+
+def _identity_env(name, email):
+    """GIT_ENV plus a fixed author/committer, instead of `git config user.*`."""
+    return {
+        **GIT_ENV,
+        "GIT_AUTHOR_NAME": name,
+        "GIT_AUTHOR_EMAIL": email,
+        "GIT_COMMITTER_NAME": name,
+        "GIT_COMMITTER_EMAIL": email,
+    }
+
+
+GIT_ENV_COMMUNITY = _identity_env(*COMMUNITY_IDENTITY)
+GIT_ENV_ENTERPRISE = _identity_env(*ENTERPRISE_IDENTITY)
+
+def run(cmd, cwd=None, check=True, capture=False, env=GIT_ENV):
+    """Run a command and return result.
+
+    `cmd` is an argument list, or a string run through the shell (used for
+    the scripts under test). Stdout is discarded unless `capture` is set;
+    stderr is always kept and printed if a checked command fails.
+    """
+    print(f"🔧 Running: {cmd if isinstance(cmd, str) else shlex.join(map(str, cmd))}")
     if cwd:
         print(f"   in: {cwd}")
 
     result = subprocess.run(
-        cmd, shell=True, cwd=cwd,
-        capture_output=capture_output,
+        cmd, shell=isinstance(cmd, str), cwd=cwd, env=env,
+        stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
         text=True
     )
 
     if check and result.returncode != 0:
         print(f"❌ Command failed: {cmd}")
-        print(f"stdout: {result.stdout}")
+        if capture:
+            print(f"stdout: {result.stdout}")
         print(f"stderr: {result.stderr}")
-        raise subprocess.CalledProcessError(result.returncode, cmd)
+        raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
 
     return result
 
-def setup_git_repo(name, email):
-    """Configure git user in a repository."""
-    run(f"git config user.name '{name}'", cwd=None, check=False)
-    run(f"git config user.email '{email}'", cwd=None, check=False)
+def stream_commits(repo_path, commits, committer, parent=None):
+    """Write (filename, content, message) commits to main with setup_repos.fast_import.
+
+    `parent` is the ref the series starts from (None for a new history); the
+    worktree is reset to the result afterwards.
+    """
+    fast_import(repo_path, "refs/heads/main", commits, committer, parent=parent, env=GIT_ENV)
+    run(["git", "reset", "--hard", "-q"], cwd=repo_path)
+
+
+# repo_path -> (filename, content, message) commits buffered by create_commit
+_pending_commits = {}
+# Numbers the default filenames handed out by create_commit
+_commit_counter = count()
+
 
 def create_commit(repo_path, message, filename=None):
-    """Create a commit in the given repository."""
+    """Queue a commit for the given repository; written by flush_commits()."""
     if filename is None:
-        filename = f"file_{datetime.now().strftime('%H%M%S')}.txt"
+        filename = f"file{next(_commit_counter)}.txt"
+
+    content = message + "\n"
+    _pending_commits.setdefault(repo_path, []).append((filename, content, message))
 
-    file_path = repo_path / filename
-    content = f"{message}\nCreated at {datetime.now()}\n"
+    return repo_path / filename
 
-    file_path.write_text(content)
-    run(f"git add {filename}", cwd=repo_path)
-    run(f"git commit -m '{message}'", cwd=repo_path)
 
-    return file_path
+def flush_commits(repo_path, committer):
+    """Write the commits queued by create_commit() on top of main."""
+    commits = _pending_commits.pop(repo_path, [])
+    if commits:
+        stream_commits(repo_path, commits, committer, parent="refs/heads/main")
 
 def get_commit_count(repo_path):
     """Get total commit count in repository."""
-    result = run("git rev-list --count HEAD", cwd=repo_path)
+    result = run(["git", "rev-list", "--count", "HEAD"], cwd=repo_path, capture=True)
     return int(result.stdout.strip())
 
 def get_commit_messages(repo_path, max_count=10):
-    """Get recent commit messages."""
-    result = run(f"git log --oneline -{max_count}", cwd=repo_path)
-    return [line.strip() for line in result.stdout.strip().split('\n') if line.strip()]
+    """Get recent commit messages (all of them if max_count is None)."""
+    # Unit/record separators instead of newlines, so an empty subject can't
+    # shift the records
+    limit = ["-n", str(max_count)] if max_count is not None else []
+    result = run(["git", "log", *limit, "--format=%h%x1f%s%x1e"], cwd=repo_path, capture=True)
+    records = result.stdout.split("\x1e")[:-1]
+    return [" ".join(record.lstrip("\n").split("\x1f", 1)) for record in records]
 
 def show_repo_state(name, repo_path):
     """Show current state of repository."""
+    # One `git log` gives both the count and the recent messages
+    messages = get_commit_messages(repo_path, max_count=None)
     print(f"\n📋 {name} Repository State:")
     print(f"   Path: {repo_path}")
-    print(f"   Commits: {get_commit_count(repo_path)}")
+    print(f"   Commits: {len(messages)}")
     print("   Recent commits:")
-    for msg in get_commit_messages(repo_path, 5):
+    for msg in messages[:5]:
         print(f"     {msg}")
 
 def setup_test_scenario():
@@ -88,48 +159,39 @@ def setup_test_scenario():
 
     # Create directories
     COMMUNITY_REPO.mkdir(parents=True, exist_ok=True)
-    ENTERPRISE_REPO.mkdir(parents=True, exist_ok=True)
 
     # Setup community repo
     print("\n🏗️  Creating community repository...")
-    run("git init", cwd=COMMUNITY_REPO)
-    setup_git_repo("Community User", "community@example.com")
+    run(["git", "init", "-b", "main"], cwd=COMMUNITY_REPO, env=GIT_ENV_COMMUNITY)
 
     # Create 3 community commits
     print("📝 Creating 3 community commits...")
-    create_commit(COMMUNITY_REPO, "feat: add core functionality", "core.py")
-    create_commit(COMMUNITY_REPO, "fix: resolve import issues", "utils.py")
-    create_commit(COMMUNITY_REPO, "docs: update README", "README.md")
-
-    # Setup enterprise repo as a clone of community
+    stream_commits(COMMUNITY_REPO, [
+        (filename, message + "\n", message)
+        for message, filename in [
+            ("feat: add core functionality", "core.py"),
+            ("fix: resolve import issues", "utils.py"),
+            ("docs: update README", "README.md"),
+        ]
+    ], COMMUNITY_COMMITTER)
+
+    # Setup enterprise repo as a clone of community that reads community's
+    # objects through objects/info/alternates instead of copying them
     print("\n🏢 Creating enterprise repository...")
-    run("git init", cwd=ENTERPRISE_REPO)
-    setup_git_repo("Enterprise User", "enterprise@example.com")
-
-    # Copy community content to enterprise
-    shutil.copytree(COMMUNITY_REPO / ".git", ENTERPRISE_REPO / ".git", dirs_exist_ok=True)
-    for item in COMMUNITY_REPO.iterdir():
-        if item.name != ".git":
-            if item.is_file():
-                shutil.copy2(item, ENTERPRISE_REPO)
-            else:
-                shutil.copytree(item, ENTERPRISE_REPO / item.name, dirs_exist_ok=True)
+    run(["git", "clone", "--local", "--shared", COMMUNITY_REPO, ENTERPRISE_REPO], env=GIT_ENV_ENTERPRISE)
 
     # Create enterprise-specific commit on top
     print("📝 Creating enterprise commit...")
     create_commit(ENTERPRISE_REPO, "feat: add enterprise authentication", "auth.py")
+    flush_commits(ENTERPRISE_REPO, ENTERPRISE_COMMITTER)
 
     # Set up proper branch structure for rebase script
     print("🔧 Setting up proper branch structure...")
-    # Ensure we're on main branch (git init creates it by default now)
-    run("git checkout main", cwd=ENTERPRISE_REPO)
-
-    # Set up local origin pointing to the enterprise repo itself
-    run(f"git remote add origin {ENTERPRISE_REPO}", cwd=ENTERPRISE_REPO)
-    run("git fetch origin", cwd=ENTERPRISE_REPO)
+    # The clone is on main; point origin at the enterprise repo itself
+    run(["git", "remote", "set-url", "origin", ENTERPRISE_REPO], cwd=ENTERPRISE_REPO, env=GIT_ENV_ENTERPRISE)
 
     # Create origin/main reference pointing to current main
-    run("git update-ref refs/remotes/origin/main main", cwd=ENTERPRISE_REPO)
+    run(["git", "update-ref", "refs/remotes/origin/main", "main"], cwd=ENTERPRISE_REPO, env=GIT_ENV_ENTERPRISE)
 
     # Show initial state
     show_repo_state("Community", COMMUNITY_REPO)
@@ -154,30 +216,26 @@ def test_rebase_scenario():
     # Add new commit to community
     print("\n📝 Adding new commit to community...")
     create_commit(COMMUNITY_REPO, "feat: add new community feature", "new_feature.py")
+    flush_commits(COMMUNITY_REPO, COMMUNITY_COMMITTER)
 
     new_community_commits = get_commit_count(COMMUNITY_REPO)
     print(f"   Community now has: {new_community_commits} commits (+1)")
 
     # Setup enterprise repo to use community as remote
     print("\n🔗 Setting up community remote in enterprise...")
-    run(f"git remote add community {COMMUNITY_REPO}", cwd=ENTERPRISE_REPO)
-    run("git fetch community", cwd=ENTERPRISE_REPO)
-
-    # Get the rebase script path (assuming it exists in ../scripts)
-    scripts_dir = Path(__file__).parent.parent / "scripts"
-    rebase_script = scripts_dir / "rebase-community-batch.sh"
-
-    if not rebase_script.exists():
-        print(f"❌ Rebase script not found: {rebase_script}")
-        print("   This test requires the rebase scripts to be available")
-        return False
+    # The new commit is already visible through the alternates, so only the
+    # remote-tracking ref needs to move
+    community_main = run(["git", "rev-parse", "main"], cwd=COMMUNITY_REPO, capture=True).stdout.strip()
+    run(["git", "remote", "add", "community", COMMUNITY_REPO], cwd=ENTERPRISE_REPO, env=GIT_ENV_ENTERPRISE)
+    run(["git", "update-ref", "refs/remotes/community/main", community_main],
+        cwd=ENTERPRISE_REPO, env=GIT_ENV_ENTERPRISE)
 
     # Run the rebase script (now includes CI validation)
     print("\n🔄 Running rebase script with CI validation...")
-    cmd = f"{rebase_script} --max-commits 1"
+    cmd = f"{REBASE_SCRIPT} --max-commits 1"
 
     try:
-        result = run(cmd, cwd=ENTERPRISE_REPO, check=False)
+        result = run(cmd, cwd=ENTERPRISE_REPO, check=False, capture=True, env=GIT_ENV_ENTERPRISE)
         if result.returncode != 0:
             print(f"❌ Rebase script failed with exit code {result.returncode}")
             print(f"stderr: {result.stderr}")
@@ -240,6 +298,13 @@ def main():
     print("when syncing new community commits via rebase.")
 
     try:
+        # Checked inside the try so the finally removes TEST_DIR, which
+        # mkdtemp already created at import time
+        if not REBASE_SCRIPT.exists():
+            print(f"❌ Rebase script not found: {REBASE_SCRIPT}")
+            print("   This test requires the rebase scripts to be available")
+            return 1
+
         # Setup the git universe
         if not setup_test_scenario():
             print("❌ Failed to setup test scenario")
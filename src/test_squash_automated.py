@@ -8,92 +8,162 @@ Setup:
 - Test: Squash the 3 enterprise patches into 1 commit
 """
 
+import shlex
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 
-TEST_DIR = Path("/tmp/test-community-sync")
-ENTERPRISE_REPO = TEST_DIR / "enterprise-repo"
+_SRC_DIR = str(Path(__file__).parent)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
 
+# Same tmpfs-preferring, TEST_DIR-overridable ({pid} expanded) location as
+# the rebase suite
+from setup_repos import TEST_DIR, fast_import
 
-def run(cmd, cwd=None, check=True):
-    """Run shell command."""
-    print(f"  $ {cmd}")
-    result = subprocess.run(cmd, shell=True, cwd=cwd, check=check, capture_output=True, text=True)
+ENTERPRISE_REPO = TEST_DIR / "enterprise-repo"
+SCRIPTS_DIR = (Path(__file__).parent.parent / "scripts").resolve()
+SQUASH_SCRIPT = SCRIPTS_DIR / "squash-enterprise-patches.sh"
+
+
+def run(argv, cwd=None, check=True, capture=False):
+    """Run a command given as an argument list (no shell).
+
+    Stdout is discarded unless `capture` is set, in which case it is echoed
+    and returned on the result. Stderr is printed if a checked command fails.
+    """
+    print(f"  $ {shlex.join(argv)}")
+    result = subprocess.run(
+        argv,
+        cwd=cwd,
+        stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
     if result.stdout:
         print(f"    {result.stdout.strip()}")
+    if check and result.returncode != 0:
+        if result.stderr:
+            print(f"    {result.stderr.strip()}")
+        raise subprocess.CalledProcessError(result.returncode, argv, result.stdout, result.stderr)
     return result
 
 
-def setup_simple_test():
+COMMUNITY_COMMITS = [
+    ("README.md", "# Community\n", "initial: add README"),
+    ("feature1.txt", "Feature 1\n", "feat: add feature 1"),
+    ("feature2.txt", "Feature 2\n", "feat: add feature 2"),
+]
+ENTERPRISE_PATCHES = [
+    (f"enterprise{i}.txt", f"Enterprise {i}\n", f"feat: enterprise patch {i}")
+    for i in range(1, 4)
+]
+
+
+def setup_simple_test(legacy=False):
     """Create simple test scenario: 3 community + 3 enterprise commits."""
     print("🧹 Setting up simple test scenario...")
 
     # Clean up
-    if TEST_DIR.exists():
-        subprocess.run(f"rm -rf {TEST_DIR}", shell=True)
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
     TEST_DIR.mkdir(parents=True)
 
-    print("\n📦 Creating community repository...")
     community_origin = TEST_DIR / "community-origin"
     community_repo = TEST_DIR / "community-repo"
+    enterprise_origin = TEST_DIR / "enterprise-origin"
+    enterprise_repo = TEST_DIR / "enterprise-repo"
 
-    # Create community repo with exactly 3 commits
-    run(f"git init --bare {community_origin}")
-    run(f"git clone {community_origin} {community_repo}")
-    run("git config user.name 'Community Bot'", cwd=community_repo)
-    run("git config user.email 'community@test.com'", cwd=community_repo)
+    if legacy:
+        create_histories_legacy(community_origin, community_repo, enterprise_origin, enterprise_repo)
+    else:
+        create_histories(community_origin, community_repo, enterprise_origin, enterprise_repo)
 
-    # Commit 1: Initial
-    (community_repo / "README.md").write_text("# Community\n")
-    run("git add README.md", cwd=community_repo)
-    run("git commit -m 'initial: add README'", cwd=community_repo)
+    print("\n✅ Setup complete!")
+    print("Community: 3 commits")
+    print("Enterprise: 6 commits (3 community + 3 enterprise)")
 
-    # Commit 2: Feature 1
-    (community_repo / "feature1.txt").write_text("Feature 1\n")
-    run("git add feature1.txt", cwd=community_repo)
-    run("git commit -m 'feat: add feature 1'", cwd=community_repo)
+    return enterprise_repo
 
-    # Commit 3: Feature 2
-    (community_repo / "feature2.txt").write_text("Feature 2\n")
-    run("git add feature2.txt", cwd=community_repo)
-    run("git commit -m 'feat: add feature 2'", cwd=community_repo)
 
-    run("git push origin main", cwd=community_repo)
+def create_histories(community_origin, community_repo, enterprise_origin, enterprise_repo):
+    """Build both histories in the bare origins with fast-import, then clone them."""
+    print("\n📦 Creating community repository...")
+    run(["git", "init", "--bare", str(community_origin)])
+    fast_import(community_origin, "refs/heads/main", COMMUNITY_COMMITS,
+                "Community Bot <community@test.com>")
+    run(["git", "clone", str(community_origin), str(community_repo)])
+    run(["git", "config", "user.name", "Community Bot"], cwd=community_repo)
+    run(["git", "config", "user.email", "community@test.com"], cwd=community_repo)
+
+    print("\n📦 Creating enterprise repository...")
+    # enterprise-origin borrows community-origin's objects through
+    # objects/info/alternates (the clones below inherit it), so the community
+    # history is referenced rather than fetched; then stack the patches
+    community_main = run(["git", "rev-parse", "main"], cwd=community_origin,
+                         capture=True).stdout.strip()
+    run(["git", "init", "--bare", str(enterprise_origin)])
+    (enterprise_origin / "objects" / "info" / "alternates").write_text(
+        f"{community_origin / 'objects'}\n")
+    run(["git", "update-ref", "refs/heads/main", community_main], cwd=enterprise_origin)
+    fast_import(enterprise_origin, "refs/heads/main", ENTERPRISE_PATCHES,
+                "Enterprise Bot <enterprise@test.com>", parent="refs/heads/main")
+    run(["git", "clone", str(enterprise_origin), str(enterprise_repo)])
+    run(["git", "config", "user.name", "Enterprise Bot"], cwd=enterprise_repo)
+    run(["git", "config", "user.email", "enterprise@test.com"], cwd=enterprise_repo)
+    run(["git", "remote", "add", "community", str(community_origin)], cwd=enterprise_repo)
+    run(["git", "update-ref", "refs/remotes/community/main", community_main], cwd=enterprise_repo)
+
+
+def create_histories_legacy(community_origin, community_repo, enterprise_origin, enterprise_repo):
+    """Build both histories with one porcelain commit per file (for debugging)."""
+    print("\n📦 Creating community repository...")
+
+    # Create community repo with exactly 3 commits
+    run(["git", "init", "--bare", str(community_origin)])
+    run(["git", "clone", str(community_origin), str(community_repo)])
+    run(["git", "config", "user.name", "Community Bot"], cwd=community_repo)
+    run(["git", "config", "user.email", "community@test.com"], cwd=community_repo)
+
+    # Commit 1: Initial, then 2 features
+    for filename, content, message in COMMUNITY_COMMITS:
+        (community_repo / filename).write_text(content)
+        run(["git", "add", filename], cwd=community_repo)
+        run(["git", "commit", "-m", message], cwd=community_repo)
+
+    run(["git", "push", "origin", "main"], cwd=community_repo)
 
     print("\n📦 Creating enterprise repository...")
-    enterprise_origin = TEST_DIR / "enterprise-origin"
-    enterprise_repo = TEST_DIR / "enterprise-repo"
 
     # Create enterprise repo from community
-    run(f"git init --bare {enterprise_origin}")
-    run(f"git clone {community_origin} {enterprise_repo}")
-    run(f"git remote set-url origin {enterprise_origin}", cwd=enterprise_repo)
-    run("git config user.name 'Enterprise Bot'", cwd=enterprise_repo)
-    run("git config user.email 'enterprise@test.com'", cwd=enterprise_repo)
-    run(f"git remote add community {community_origin}", cwd=enterprise_repo)
-    run("git fetch community", cwd=enterprise_repo)
+    run(["git", "init", "--bare", str(enterprise_origin)])
+    run(["git", "clone", str(community_origin), str(enterprise_repo)])
+    run(["git", "remote", "set-url", "origin", str(enterprise_origin)], cwd=enterprise_repo)
+    run(["git", "config", "user.name", "Enterprise Bot"], cwd=enterprise_repo)
+    run(["git", "config", "user.email", "enterprise@test.com"], cwd=enterprise_repo)
+    run(["git", "remote", "add", "community", str(community_origin)], cwd=enterprise_repo)
+    run(["git", "fetch", "community"], cwd=enterprise_repo)
 
     # Add 3 enterprise patches
-    (enterprise_repo / "enterprise1.txt").write_text("Enterprise 1\n")
-    run("git add enterprise1.txt", cwd=enterprise_repo)
-    run("git commit -m 'feat: enterprise patch 1'", cwd=enterprise_repo)
+    for filename, content, message in ENTERPRISE_PATCHES:
+        (enterprise_repo / filename).write_text(content)
+        run(["git", "add", filename], cwd=enterprise_repo)
+        run(["git", "commit", "-m", message], cwd=enterprise_repo)
 
-    (enterprise_repo / "enterprise2.txt").write_text("Enterprise 2\n")
-    run("git add enterprise2.txt", cwd=enterprise_repo)
-    run("git commit -m 'feat: enterprise patch 2'", cwd=enterprise_repo)
+    run(["git", "push", "origin", "main"], cwd=enterprise_repo)
 
-    (enterprise_repo / "enterprise3.txt").write_text("Enterprise 3\n")
-    run("git add enterprise3.txt", cwd=enterprise_repo)
-    run("git commit -m 'feat: enterprise patch 3'", cwd=enterprise_repo)
 
-    run("git push origin main", cwd=enterprise_repo)
-
-    print("\n✅ Setup complete!")
-    print("Community: 3 commits")
-    print("Enterprise: 6 commits (3 community + 3 enterprise)")
+def compare_with_community(enterprise_repo):
+    """Return (enterprise patch log lines, community commits not in enterprise).
 
-    return enterprise_repo
+    One `git log --left-right community/main...HEAD` covers both sides of the
+    symmetric difference, so no separate merge-base or rev-list --count.
+    """
+    lines = run(["git", "log", "--oneline", "--left-right", "community/main...HEAD"],
+                cwd=enterprise_repo, capture=True).stdout.splitlines()
+    patches = [line[2:] for line in lines if line.startswith(">")]
+    behind = sum(1 for line in lines if line.startswith("<"))
+    return patches, behind
 
 
 def test_squash(enterprise_repo):
@@ -102,32 +172,23 @@ def test_squash(enterprise_repo):
 
     # Get state before
     print("\n📊 State before squash:")
-    result = run("git log --oneline -10", cwd=enterprise_repo)
+    run(["git", "log", "--oneline", "-10"], cwd=enterprise_repo, capture=True)
 
-    # Find common ancestor and show enterprise vs community
-    run("git fetch community", cwd=enterprise_repo)
-    common_ancestor = run("git merge-base HEAD community/main", cwd=enterprise_repo).stdout.strip()
+    # Show enterprise vs community (setup already pointed community/main at
+    # community-origin, and nothing moves it during the test)
+    enterprise_commits, behind = compare_with_community(enterprise_repo)
 
-    print(f"\n🔍 Common ancestor: {common_ancestor[:8]}")
+    print(f"\n🔍 Community commits missing from enterprise: {behind}")
     print("\n📋 Enterprise patches (commits after common ancestor):")
-    enterprise_commits = run(f"git log --oneline {common_ancestor}..HEAD", cwd=enterprise_repo).stdout.strip()
-    if enterprise_commits:
-        for line in enterprise_commits.split('\n'):
-            print(f"   • {line}")
+    for line in enterprise_commits:
+        print(f"   • {line}")
 
-    enterprise_patches_before = run(f"git rev-list --count {common_ancestor}..HEAD", cwd=enterprise_repo).stdout.strip()
+    enterprise_patches_before = str(len(enterprise_commits))
     print(f"\n🎯 Enterprise patches count before: {enterprise_patches_before}")
 
     # Run squash script
-    scripts_dir = Path(__file__).parent.parent / "scripts"
-    squash_script = scripts_dir / "squash-enterprise-patches.sh"
-
-    if not squash_script.exists():
-        print("❌ Squash script not found!")
-        return False
-
-    cmd = f"{squash_script} --force -m 'test: squashed enterprise patches'"
-    result = run(cmd, cwd=enterprise_repo, check=False)
+    cmd = [str(SQUASH_SCRIPT), "--force", "-m", "test: squashed enterprise patches"]
+    result = run(cmd, cwd=enterprise_repo, check=False, capture=True)
 
     if result.returncode != 0:
         print(f"❌ Squash script failed: {result.stderr}")
@@ -135,24 +196,21 @@ def test_squash(enterprise_repo):
 
     # Get state after
     print("\n📊 State after squash:")
-    result = run("git log --oneline -10", cwd=enterprise_repo)
+    run(["git", "log", "--oneline", "-10"], cwd=enterprise_repo, capture=True)
 
-    # Find common ancestor after squash and show new state
-    run("git fetch community", cwd=enterprise_repo)
-    common_ancestor_after = run("git merge-base HEAD community/main", cwd=enterprise_repo).stdout.strip()
+    # Show the new state against community
+    enterprise_commits_after, behind_after = compare_with_community(enterprise_repo)
 
-    print(f"\n🔍 Common ancestor after: {common_ancestor_after[:8]}")
+    print(f"\n🔍 Community commits missing from enterprise after: {behind_after}")
     print("\n📋 Enterprise patches after squashing:")
-    enterprise_commits_after = run(f"git log --oneline {common_ancestor_after}..HEAD", cwd=enterprise_repo).stdout.strip()
-    if enterprise_commits_after:
-        for line in enterprise_commits_after.split('\n'):
-            print(f"   • {line}")
+    for line in enterprise_commits_after:
+        print(f"   • {line}")
 
-    enterprise_patches_after = run(f"git rev-list --count {common_ancestor_after}..HEAD", cwd=enterprise_repo).stdout.strip()
+    enterprise_patches_after = str(len(enterprise_commits_after))
     print(f"\n🎯 Enterprise patches count after: {enterprise_patches_after}")
 
     # Check tags
-    tags = run("git tag -l", cwd=enterprise_repo).stdout.strip()
+    tags = run(["git", "tag", "-l"], cwd=enterprise_repo, capture=True).stdout.strip()
     print(f"\n🏷️  Tags created: {tags}")
 
     # Validate: Should have 1 enterprise patch after squashing 3
@@ -170,8 +228,16 @@ def main():
     print("🧪 Simple Squash Test")
     print("=" * 50)
 
-    enterprise_repo = setup_simple_test()
-    success = test_squash(enterprise_repo)
+    if not SQUASH_SCRIPT.exists():
+        print(f"❌ Squash script not found: {SQUASH_SCRIPT}")
+        sys.exit(1)
+
+    try:
+        # --legacy builds the repos with porcelain commits instead of fast-import
+        enterprise_repo = setup_simple_test(legacy="--legacy" in sys.argv[1:])
+        success = test_squash(enterprise_repo)
+    finally:
+        shutil.rmtree(TEST_DIR, ignore_errors=True)
 
     if success:
         print("\n🎉 Squash test PASSED!")